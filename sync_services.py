@@ -8,7 +8,8 @@ What this does:
 3) Read Reference Table rows for those services via GET
    /api/v2/reference-tables/tables/{table_id}/rows?row_id=...
    (JSON:API content-type)
-4) Create missing rows in the reference table via POST .../rows (JSON:API)
+4) Create missing rows in the reference table via POST .../rows (JSON:API,
+   batched up to 100 rows per request)
 5) Upsert Service Catalog definition via POST /api/v2/services/definitions
    with top-level service definition document (NOT wrapped in {"data":...})
 
@@ -18,16 +19,29 @@ Env:
   REF_TABLE_NAME (default reference_table)
   REF_TABLE_COL_1 (default service)
   REF_TABLE_COL_2 (default team)
+  DD_SYNC_CACHE_DIR (default ~/.cache/dd_sync)
 """
 
 import argparse
 import datetime as dt
+import itertools
+import json
+import logging
 import os
-from typing import Dict, Iterable, List, Set, Tuple
-
-import requests
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Set, Tuple
+from urllib.parse import quote
+
+import httpx
+import orjson
 from dotenv import load_dotenv
 
+logger = logging.getLogger("ddsync")
+
 
 # -----------------------------
 # Base / headers
@@ -61,30 +75,122 @@ def auth_headers_jsonapi(api_key: str, app_key: str) -> Dict[str, str]:
     }
 
 
+class RetryTransport(httpx.HTTPTransport):
+    # Retries throttled / 5xx responses with exponential backoff, honouring Retry-After
+    def __init__(
+        self,
+        *args: Any,
+        total: int = 5,
+        backoff_factor: float = 0.5,
+        status_forcelist: Iterable[int] = (429, 500, 502, 503, 504),
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.total = total
+        self.backoff_factor = backoff_factor
+        self.status_forcelist = frozenset(status_forcelist)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        for attempt in range(self.total):
+            response = super().handle_request(request)
+            if response.status_code not in self.status_forcelist:
+                return response
+            retry_after = response.headers.get("Retry-After", "")
+            response.close()
+            delay = float(retry_after) if retry_after.isdigit() else self.backoff_factor * (2**attempt)
+            time.sleep(delay)
+        return super().handle_request(request)
+
+
+def build_client(max_connections: int = 8) -> httpx.Client:
+    # One HTTP/2 client for every call: concurrent requests are multiplexed as
+    # streams over a few connections instead of one connection per request.
+    # max_connections must be at least the number of threads sharing the
+    # client: threads waiting on a full pool fail with spurious ReadErrors.
+    transport = RetryTransport(
+        http2=True,
+        retries=3,
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+    )
+    return httpx.Client(transport=transport, timeout=httpx.Timeout(30, connect=10), follow_redirects=True)
+
+
+# -----------------------------
+# Local cache
+# -----------------------------
+TABLE_ID_TTL = 24 * 60 * 60
+ROW_TTL = 60 * 60
+ROW_MISSING_TTL = 5 * 60
+ETAG_TTL = 7 * 24 * 60 * 60
+
+
+def _cache_path(name: str) -> Path:
+    root = os.getenv("DD_SYNC_CACHE_DIR") or Path.home() / ".cache" / "dd_sync"
+    return Path(root) / f"{name}.json"
+
+
+def load_cache(name: str) -> Dict[str, Dict[str, Any]]:
+    try:
+        with _cache_path(name).open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_cache(name: str, cache: Dict[str, Dict[str, Any]]) -> None:
+    # Best effort: a read-only or missing cache dir should never fail a sync
+    path = _cache_path(name)
+    now = time.time()
+    live = {k: v for k, v in cache.items() if v.get("expires", 0) >= now}
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(live, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def cache_get(cache: Dict[str, Dict[str, Any]], key: str) -> Any:
+    entry = cache.get(key)
+    if not entry or entry.get("expires", 0) < time.time():
+        return None
+    return entry.get("value")
+
+
+def cache_set(cache: Dict[str, Dict[str, Any]], key: str, value: Any, ttl: int) -> None:
+    cache[key] = {"value": value, "expires": time.time() + ttl}
+
+
 # -----------------------------
 # Small helpers
 # -----------------------------
 def assign_dummy_teams(services: Iterable[str]) -> Dict[str, str]:
-    assigned: Dict[str, str] = {}
-    teams = ["team1", "team2"]
-    for idx, service in enumerate(sorted(set(s for s in services if s))):
-        assigned[service] = teams[idx % len(teams)]
-    return assigned
+    # Sorted so the same services get the same dummy team on every run
+    return dict(zip(sorted({s for s in services if s}), itertools.cycle(("team1", "team2"))))
 
 
 def normalize_team(team: str) -> str:
     return "".join(str(team).split()).lower()
 
 
-def _extract_row_values(item: Dict) -> Dict[str, str]:
-    attrs = item.get("attributes", {}) or {}
-    return attrs.get("values") or attrs.get("value") or attrs.get("columns") or attrs
+def _row_values_extractor(items: List[Dict]) -> Callable[[Dict], Dict[str, str]]:
+    # Rows in one response share a shape, so pick the values key from the
+    # first row instead of probing every fallback key on every row.
+    first = (items[0].get("attributes", {}) or {}) if items else {}
+    key = next((k for k in ("values", "value", "columns") if k in first), None)
+    if key is None:
+        return lambda item: item.get("attributes", {}) or {}
+    return lambda item: (item.get("attributes", {}) or {}).get(key) or {}
 
 
 # -----------------------------
 # Events
 # -----------------------------
-def list_services_from_events(
+def iter_services_from_events(
+    client: httpx.Client,
     base_url: str,
     headers_json: Dict[str, str],
     start: dt.datetime,
@@ -92,10 +198,13 @@ def list_services_from_events(
     query: str,
     limit: int = 100,
     max_pages: int | None = None,
-    verbose: bool = False,
-) -> Set[str]:
-    services: Set[str] = set()
+) -> Iterator[List[str]]:
+    # Yields the services first seen on each page, as soon as that page is parsed
+    seen: Set[str] = set()
     url = f"{base_url}/api/v2/events/search"
+    # Events without a service contribute nothing; let the API filter them out
+    if query.strip() in ("", "*"):
+        query = "service:*"
     body = {
         "filter": {
             "from": start.isoformat(),
@@ -105,71 +214,124 @@ def list_services_from_events(
         "page": {"limit": limit},
     }
 
-    cursor: str | None = None
-    page = 0
-
-    while True:
-        page += 1
-        if max_pages is not None and page > max_pages:
-            if verbose:
-                print(f"Stopping at page {page - 1} (max_pages reached).")
-            break
-
-        if cursor:
-            body["page"]["cursor"] = cursor
-        elif "cursor" in (body.get("page") or {}):
-            body["page"].pop("cursor", None)
-
-        if verbose:
-            print(f"Fetching events page {page}...")
+    def fetch(page_body: Dict) -> httpx.Response:
+        return client.post(url, headers=headers_json, content=orjson.dumps(page_body))
 
-        resp = requests.post(url, headers=headers_json, json=body, timeout=(10, 30))
-        if verbose:
-            print("EVENTS:", resp.request.url, resp.status_code, resp.text[:200])
-
-        if resp.status_code == 401:
-            raise SystemExit("Unauthorized (401) for events/search. Check API+APP keys permissions.")
-        resp.raise_for_status()
-
-        data = resp.json()
-        for event in data.get("data", []) or []:
-            attrs = event.get("attributes", {}) or {}
-
-            # Your sample: attributes.attributes.service
-            nested = attrs.get("attributes", {}) or {}
-            svc = nested.get("service")
-            if svc:
-                services.add(str(svc))
-                continue
-
-            # fallback: tags list contains service:<name>
-            tags = attrs.get("tags", []) or []
-            for tag in tags:
-                if tag.startswith("service:"):
-                    services.add(tag.split("service:", 1)[1])
-
-        cursor = (data.get("meta", {}) or {}).get("page", {}).get("after")
-        if not cursor:
-            break
+    if max_pages is not None and max_pages < 1:
+        logger.debug("Stopping at page 0 (max_pages reached).")
+        return
 
-    return services
+    page = 1
+    logger.debug("Fetching events page %d...", page)
+
+    # Keep one request in flight: as soon as a page's cursor is known, start
+    # fetching the next page while the current one is being parsed.
+    with ThreadPoolExecutor(max_workers=1) as prefetch:
+        pending = prefetch.submit(fetch, body)
+        while pending is not None:
+            resp = pending.result()
+            pending = None
+            # Slice the raw bytes: resp.text would decode the whole page just to show 200 chars
+            logger.debug("EVENTS: %s %s %s", resp.request.url, resp.status_code, resp.content[:200].decode("utf-8", "replace"))
+
+            if resp.status_code == 401:
+                raise SystemExit("Unauthorized (401) for events/search. Check API+APP keys permissions.")
+            resp.raise_for_status()
+
+            data = orjson.loads(resp.content)
+            cursor = (data.get("meta", {}) or {}).get("page", {}).get("after")
+            if cursor:
+                if max_pages is not None and page >= max_pages:
+                    logger.debug("Stopping at page %d (max_pages reached).", page)
+                else:
+                    page += 1
+                    logger.debug("Fetching events page %d...", page)
+                    pending = prefetch.submit(fetch, {**body, "page": {**body["page"], "cursor": cursor}})
+
+            services: Set[str] = set()
+            for event in data.get("data", []) or []:
+                attrs = event.get("attributes", {}) or {}
+
+                # Your sample: attributes.attributes.service
+                nested = attrs.get("attributes", {}) or {}
+                svc = nested.get("service")
+                if svc:
+                    services.add(str(svc))
+                    continue
+
+                # fallback: tags list contains service:<name>
+                tags = attrs.get("tags", []) or []
+                for tag in tags:
+                    # Single scan of the tag: "service:<name>" -> ("service", ":", "<name>")
+                    key, sep, value = tag.partition(":")
+                    if sep and key == "service":
+                        services.add(value)
+
+            new_services = services - seen
+            if new_services:
+                seen |= new_services
+                yield list(new_services)
 
 
 # -----------------------------
 # Reference Tables
 # -----------------------------
-def list_reference_tables(base_url: str, headers_jsonapi: Dict[str, str]) -> List[Dict[str, str]]:
+# Batch size the rows endpoint has always accepted; larger batches that get a
+# 400 are split back down towards it.
+ROW_LOOKUP_BATCH = 100
+# Row lookups repeat row_id=... in the query string, so size requests by
+# encoded length (staying well under common 8KB URL limits) as well as count.
+ROW_LOOKUP_MAX_IDS = 500
+ROW_LOOKUP_MAX_QUERY_BYTES = 6000
+# While paging events, don't hold discovered ids back longer than this
+ROW_LOOKUP_MAX_WAIT = 0.5
+
+
+def _get_with_etag(
+    client: httpx.Client,
+    url: str,
+    headers: Dict[str, str],
+    params: Dict[str, str] | None,
+    etags: Dict[str, Dict[str, Any]] | None,
+) -> Tuple[httpx.Response, bytes]:
+    # Conditional GET: on 304 Not Modified, replay the body cached for this page URL
+    if etags is None:
+        resp = client.get(url, headers=headers, params=params)
+        return resp, resp.content
+
+    key = str(httpx.Request("GET", url, params=params).url)
+    cached = cache_get(etags, key)
+    if cached:
+        headers = {**headers, "If-None-Match": cached["etag"]}
+
+    resp = client.get(url, headers=headers, params=params)
+    if resp.status_code == 304 and cached:
+        return resp, cached["body"].encode("utf-8")
+
+    etag = resp.headers.get("ETag")
+    if resp.status_code == 200 and etag:
+        cache_set(etags, key, {"etag": etag, "body": resp.content.decode("utf-8")}, ETAG_TTL)
+    return resp, resp.content
+
+
+def list_reference_tables(
+    client: httpx.Client,
+    base_url: str,
+    headers_jsonapi: Dict[str, str],
+    etags: Dict[str, Dict[str, Any]] | None = None,
+) -> List[Dict[str, str]]:
     url = f"{base_url}/api/v2/reference-tables/tables"
     params = {"page[limit]": "100"}
     out: List[Dict[str, str]] = []
 
     while True:
-        resp = requests.get(url, headers=headers_jsonapi, params=params, timeout=30)
+        resp, content = _get_with_etag(client, url, headers_jsonapi, params, etags)
         if resp.status_code == 401:
             raise SystemExit("Unauthorized (401) listing reference tables.")
-        resp.raise_for_status()
+        if resp.status_code != 304:
+            resp.raise_for_status()
 
-        payload = resp.json()
+        payload = orjson.loads(content)
         for item in payload.get("data", []) or []:
             attrs = item.get("attributes", {}) or {}
             out.append(
@@ -190,35 +352,56 @@ def list_reference_tables(base_url: str, headers_jsonapi: Dict[str, str]) -> Lis
 
 
 def get_reference_table_id(
+    client: httpx.Client,
     base_url: str,
     headers_jsonapi: Dict[str, str],
     table_name: str,
+    etags: Dict[str, Dict[str, Any]] | None = None,
     verbose: bool = False,
 ) -> str:
     url = f"{base_url}/api/v2/reference-tables/tables"
     params = {"page[limit]": "100"}
+    # Only needed for the verbose "not found" hint
     available: List[str] = []
+    target = table_name.strip().lower()
+
+    def find_table(items: List[Dict]) -> str:
+        for item in items:
+            attrs = item.get("attributes", {}) or {}
+            api_name = (attrs.get("table_name") or attrs.get("name") or "").strip()
+            if verbose and api_name:
+                available.append(api_name)
+
+            item_id = item.get("id") or ""
+            if api_name.lower() == target or item_id.lower() == target:
+                return item_id
+        return ""
+
+    # Ask for the exact name first: one request instead of paging through every
+    # table. Results are still matched locally, so if the filter is ignored or
+    # the name is really a table id we fall through to the full scan.
+    exact_params = {"filter[table_name][exact]": table_name.strip(), "page[limit]": "1"}
+    resp, content = _get_with_etag(client, url, headers_jsonapi, exact_params, etags)
+    if resp.status_code == 401:
+        raise SystemExit("Unauthorized (401) reading reference tables.")
+    if resp.status_code in (200, 304):
+        table_id = find_table(orjson.loads(content).get("data", []) or [])
+        if table_id:
+            return table_id
 
     while True:
-        resp = requests.get(url, headers=headers_jsonapi, params=params, timeout=30)
+        resp, content = _get_with_etag(client, url, headers_jsonapi, params, etags)
         if resp.status_code == 401:
             raise SystemExit("Unauthorized (401) reading reference tables.")
         if resp.status_code == 404:
             break
-        resp.raise_for_status()
+        if resp.status_code != 304:
+            resp.raise_for_status()
 
-        payload = resp.json()
-        for item in payload.get("data", []) or []:
-            attrs = item.get("attributes", {}) or {}
-            api_name = (attrs.get("table_name") or attrs.get("name") or "").strip()
-            if api_name:
-                available.append(api_name)
-
-            if api_name.lower() == table_name.lower():
-                return item.get("id") or ""
-
-            if (item.get("id") or "").lower() == table_name.lower():
-                return item.get("id") or ""
+        payload = orjson.loads(content)
+        table_id = find_table(payload.get("data", []) or [])
+        if table_id:
+            return table_id
 
         next_link = payload.get("links", {}).get("next")
         if not next_link:
@@ -233,70 +416,172 @@ def get_reference_table_id(
     raise SystemExit(f"Reference table not found: {table_name}")
 
 
+def _table_cache_key(base_url: str, table_name: str) -> str:
+    return f"{base_url}|{table_name.strip().lower()}"
+
+
+def resolve_reference_table_id(
+    client: httpx.Client,
+    base_url: str,
+    headers_jsonapi: Dict[str, str],
+    table_name: str,
+    use_cache: bool = True,
+    verbose: bool = False,
+) -> Tuple[str, bool]:
+    # Table IDs are stable, so skip paging through every table when we've
+    # resolved this name recently. Returns (table_id, from_cache).
+    cache = load_cache("tables") if use_cache else {}
+    key = _table_cache_key(base_url, table_name)
+    table_id = cache_get(cache, key)
+    if table_id:
+        logger.debug("Using cached reference table id %s for %s", table_id, table_name)
+        return table_id, True
+
+    etags = load_cache("etags") if use_cache else None
+    table_id = get_reference_table_id(
+        client=client,
+        base_url=base_url,
+        headers_jsonapi=headers_jsonapi,
+        table_name=table_name,
+        etags=etags,
+        verbose=verbose,
+    )
+    if use_cache and table_id:
+        cache_set(cache, key, table_id, TABLE_ID_TTL)
+        save_cache("tables", cache)
+        save_cache("etags", etags)
+    return table_id, False
+
+
+def forget_reference_table_id(base_url: str, table_name: str) -> None:
+    cache = load_cache("tables")
+    if cache.pop(_table_cache_key(base_url, table_name), None) is not None:
+        save_cache("tables", cache)
+
+
 def get_reference_table_rows_endpoint(base_url: str, table_id: str) -> str:
     return f"{base_url}/api/v2/reference-tables/tables/{table_id}/rows"
 
 
+def _row_cache_key(rows_url: str, row_id: str) -> str:
+    return f"{rows_url}|{row_id}"
+
+
+def forget_reference_table_rows(cache: Dict[str, Dict[str, Any]], rows_url: str, row_ids: Iterable[str]) -> None:
+    for row_id in row_ids:
+        cache.pop(_row_cache_key(rows_url, row_id), None)
+
+
+def _chunk_row_ids(row_ids: List[str]) -> Iterator[List[str]]:
+    chunk: List[str] = []
+    size = 0
+    for rid in row_ids:
+        cost = len("&row_id=") + len(quote(rid, safe=""))
+        if chunk and (len(chunk) >= ROW_LOOKUP_MAX_IDS or size + cost > ROW_LOOKUP_MAX_QUERY_BYTES):
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(rid)
+        size += cost
+    if chunk:
+        yield chunk
+
+
 def get_reference_table_rows_by_id(
+    client: httpx.Client,
     rows_url: str,
     headers_jsonapi: Dict[str, str],
     row_ids: Iterable[str],
     service_col: str,
     team_col: str,
-    verbose: bool = False,
+    cache: Dict[str, Dict[str, Any]] | None = None,
 ) -> Tuple[Dict[str, str], Dict[str, str]]:
     mapping: Dict[str, str] = {}
     raw_teams: Dict[str, str] = {}
-    row_list = [r for r in row_ids if r]
+    row_list: List[str] = []
+
+    # Cached value is the raw team for a known row, or False for a row the
+    # API recently reported missing.
+    for rid in row_ids:
+        if not rid:
+            continue
+        cached = cache_get(cache, _row_cache_key(rows_url, rid)) if cache is not None else None
+        if cached is None:
+            row_list.append(rid)
+        elif cached is not False:
+            raw_teams[rid] = cached
+            mapping[rid] = normalize_team(cached)
+
+    if cache is not None:
+        logger.debug("Reference table rows cached: %d, fetching: %d", len(mapping), len(row_list))
     if not row_list:
-        return mapping
+        return mapping, raw_teams
 
-    chunk_size = 100
-    for start in range(0, len(row_list), chunk_size):
-        chunk = row_list[start : start + chunk_size]
+    chunks = list(_chunk_row_ids(row_list))
+    while chunks:
+        chunk = chunks.pop()
         params = [("row_id", rid) for rid in chunk]
 
-        resp = requests.get(rows_url, headers=headers_jsonapi, params=params, timeout=30)
-        if verbose:
-            print("ROWS:", resp.request.url, resp.status_code, resp.text[:200])
+        resp = client.get(rows_url, headers=headers_jsonapi, params=params)
+        logger.debug("ROWS: %s %s %s", resp.request.url, resp.status_code, resp.content[:200].decode("utf-8", "replace"))
 
         if resp.status_code == 401:
             raise SystemExit("Unauthorized (401) reading reference table rows.")
+        too_large = resp.status_code in (413, 414) or (resp.status_code == 400 and len(chunk) > ROW_LOOKUP_BATCH)
+        if too_large and len(chunk) > 1:
+            # More ids than this endpoint accepts in one request; split and retry
+            mid = len(chunk) // 2
+            chunks.extend((chunk[mid:], chunk[:mid]))
+            continue
         if resp.status_code == 404:
             # Some orgs return 404 when rows are missing but include meta.not_found
             try:
-                payload = resp.json()
+                payload = orjson.loads(resp.content)
             except ValueError:
                 payload = {}
             if payload.get("meta", {}).get("not_found") is not None:
+                if cache is not None:
+                    for rid in chunk:
+                        cache_set(cache, _row_cache_key(rows_url, rid), False, ROW_MISSING_TTL)
                 continue
             raise SystemExit("Rows endpoint not found. Verify rows URL/path.")
         if resp.status_code >= 400:
             raise SystemExit(f"Reference table rows request failed: {resp.status_code} {resp.text}")
 
-        payload = resp.json()
-        for item in payload.get("data", []) or []:
-            values = _extract_row_values(item)
+        payload = orjson.loads(resp.content)
+        items = payload.get("data", []) or []
+        extract_values = _row_values_extractor(items)
+        for item in items:
+            values = extract_values(item)
             service = (values.get(service_col) or "").strip()
             team = (values.get(team_col) or "").strip()
             if service:
                 raw_teams[service] = team
                 mapping[service] = normalize_team(team)
+                if cache is not None:
+                    cache_set(cache, _row_cache_key(rows_url, service), team, ROW_TTL)
+
+        if cache is not None:
+            for rid in chunk:
+                if rid not in raw_teams:
+                    cache_set(cache, _row_cache_key(rows_url, rid), False, ROW_MISSING_TTL)
 
     return mapping, raw_teams
 
 
 def create_reference_table_rows(
+    client: httpx.Client,
     rows_url: str,
     headers_jsonapi: Dict[str, str],
     service_col: str,
     team_col: str,
     rows: Dict[str, str],
+    executor: ThreadPoolExecutor,
+    chunk_size: int = 100,
 ) -> Tuple[int, List[str]]:
     created = 0
     failures: List[str] = []
 
-    for service, team in rows.items():
+    def post_rows(chunk: List[Tuple[str, str]]) -> Tuple[int, List[str]]:
         payload = {
             "data": [
                 {
@@ -309,15 +594,38 @@ def create_reference_table_rows(
                         }
                     },
                 }
+                for service, team in chunk
             ]
         }
-        resp = requests.post(rows_url, headers=headers_jsonapi, json=payload, timeout=30)
+        try:
+            resp = client.post(rows_url, headers=headers_jsonapi, content=orjson.dumps(payload))
+        except httpx.HTTPError as exc:
+            return 0, [f"{service}: {exc}" for service, _ in chunk]
+
         if resp.status_code in (200, 201):
-            created += 1
-            continue
-        if resp.status_code == 409:
-            continue
-        failures.append(f"{service}: {resp.status_code} {resp.text}")
+            try:
+                data = orjson.loads(resp.content).get("data")
+            except ValueError:
+                data = None
+            return (len(data) if isinstance(data, list) else len(chunk)), []
+        if resp.status_code == 409 and len(chunk) == 1:
+            return 0, []
+        # Only validation/conflict errors are row-specific; auth and rate limit
+        # errors would fail every row too, so report the batch as a whole.
+        if resp.status_code in (400, 409, 422) and len(chunk) > 1:
+            # A single duplicate or invalid row rejects the whole batch;
+            # retry row by row so the rest still get created.
+            results = [post_rows([row]) for row in chunk]
+            return sum(n for n, _ in results), [f for _, errs in results for f in errs]
+        return 0, [f"{service}: {resp.status_code} {resp.text}" for service, _ in chunk]
+
+    # JSON:API `data` is a list, so send rows in batches and fan the batches out
+    items = list(rows.items())
+    chunks = [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+    # Run on the caller's pool so inserts count against the client's connection limit
+    for chunk_created, chunk_failures in executor.map(post_rows, chunks):
+        created += chunk_created
+        failures.extend(chunk_failures)
 
     return created, failures
 
@@ -326,6 +634,7 @@ def create_reference_table_rows(
 # Service Catalog (Service Definitions)
 # -----------------------------
 def upsert_service_definition(
+    client: httpx.Client,
     base_url: str,
     headers_json: Dict[str, str],
     service: str,
@@ -339,13 +648,27 @@ def upsert_service_definition(
         "team": team,
     }
 
-    resp = requests.post(url, headers=headers_json, json=payload, timeout=30)
+    resp = client.post(url, headers=headers_json, content=orjson.dumps(payload))
 
     if resp.status_code in (200, 201):
         return True, "created_or_updated"
     return False, f"{resp.status_code} {resp.text}"
 
 
+def _try_upsert_service_definition(
+    client: httpx.Client,
+    base_url: str,
+    headers_json: Dict[str, str],
+    service: str,
+    team: str,
+    verbose: bool = False,
+) -> Tuple[bool, str]:
+    try:
+        return upsert_service_definition(client, base_url, headers_json, service, team, verbose=verbose)
+    except httpx.HTTPError as exc:
+        return False, str(exc)
+
+
 # -----------------------------
 # CLI / main
 # -----------------------------
@@ -358,8 +681,10 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--query", default="*", help="Datadog Events query string")
     p.add_argument("--page-limit", type=int, default=100, help="Events page size (max 100)")
     p.add_argument("--max-pages", type=int, default=None, help="Stop after this many pages")
+    p.add_argument("--concurrency", type=int, default=16, help="Max concurrent reference table / service catalog requests")
     p.add_argument("--verbose", action="store_true", help="Verbose logging")
     p.add_argument("--list-tables", action="store_true", help="List reference tables then exit")
+    p.add_argument("--no-cache", action="store_true", help="Ignore the local cache and always query the API")
     p.add_argument("--dry-run", action="store_true", help="Do not write reference table rows or service definitions")
     return p.parse_args()
 
@@ -385,131 +710,232 @@ def main() -> None:
     headers_jsonapi = auth_headers_jsonapi(api_key, app_key)
 
     args = parse_args()
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG if args.verbose else logging.INFO)
     table_name = args.table or table_name
     service_col = args.service_col or service_col
     team_col = args.team_col or team_col
 
-    if args.list_tables:
-        tables = list_reference_tables(base_url, headers_jsonapi)
-        if not tables:
-            print("No reference tables found.")
+    # Every request comes from the shared worker pool or the single events
+    # prefetch thread, so size the connection pool to match (see build_client).
+    with build_client(max_connections=max(1, args.concurrency) + 1) as client:
+        if args.list_tables:
+            etags = None if args.no_cache else load_cache("etags")
+            tables = list_reference_tables(client, base_url, headers_jsonapi, etags=etags)
+            if etags is not None:
+                save_cache("etags", etags)
+            if not tables:
+                print("No reference tables found.")
+                return
+            print("Reference tables:")
+            for t in tables:
+                print(f"- {t['id']}  name={t['name'] or '(no name)'}")
             return
-        print("Reference tables:")
-        for t in tables:
-            print(f"- {t['id']}  name={t['name'] or '(no name)'}")
-        return
-
-    end = dt.datetime.now(dt.UTC)
-    start = end - dt.timedelta(days=args.days)
-
-    services = list_services_from_events(
-        base_url=base_url,
-        headers_json=headers_json,
-        start=start,
-        end=end,
-        query=args.query,
-        limit=args.page_limit,
-        max_pages=args.max_pages,
-        verbose=args.verbose,
-    )
-
-    if not services:
-        print("No services found in events for the given query/time window.")
-        return
-
-    table_id = table_id_override or get_reference_table_id(
-        base_url=base_url,
-        headers_jsonapi=headers_jsonapi,
-        table_name=table_name,
-        verbose=args.verbose,
-    )
-
-    rows_url = get_reference_table_rows_endpoint(base_url, table_id)
-
-    mapping, raw_teams = get_reference_table_rows_by_id(
-        rows_url=rows_url,
-        headers_jsonapi=headers_jsonapi,
-        row_ids=services,
-        service_col=service_col,
-        team_col=team_col,
-        verbose=args.verbose,
-    )
-
-    updates = {
-        service: normalize_team(team)
-        for service, team in raw_teams.items()
-        if team and normalize_team(team) != team
-    }
-    if updates:
-        if args.dry_run:
-            if args.verbose:
-                print(f"DRY RUN: would normalize {len(updates)} reference table rows")
-        else:
-            create_reference_table_rows(
-                rows_url=rows_url,
-                headers_jsonapi=headers_jsonapi,
-                service_col=service_col,
-                team_col=team_col,
-                rows=updates,
-            )
-
-    # Create missing mappings (dummy teams)
-    missing_services = [s for s in services if s not in mapping]
-    dummy_rows = assign_dummy_teams(missing_services)
-
-    if dummy_rows:
-        if args.dry_run:
-            if args.verbose:
-                print(f"DRY RUN: would create {len(dummy_rows)} reference table rows")
-            mapping.update(dummy_rows)
-        else:
-            created, failures = create_reference_table_rows(
-                rows_url=rows_url,
-                headers_jsonapi=headers_jsonapi,
-                service_col=service_col,
-                team_col=team_col,
-                rows=dummy_rows,
-            )
-            if args.verbose:
-                print(f"Reference table rows created: {created}")
-            if failures:
-                print("Reference table insert failures:")
-                for f in failures:
-                    print(f"- {f}")
-            mapping.update(dummy_rows)
-
-    updated = 0
-    skipped = 0
-    failures = 0
-    missing_team: List[str] = []
-
-    for service in sorted(services):
-        team = (mapping.get(service) or "").strip()
-        if not team:
-            skipped += 1
-            missing_team.append(service)
-            continue
-
-        if args.dry_run:
-            updated += 1
-            continue
 
-        ok, msg = upsert_service_definition(base_url, headers_json, service, team, verbose=args.verbose)
-        if ok:
-            updated += 1
-        else:
-            failures += 1
+        end = dt.datetime.now(dt.UTC)
+        start = end - dt.timedelta(days=args.days)
+
+        services: Set[str] = set()
+        mapping: Dict[str, str] = {}
+        raw_teams: Dict[str, str] = {}
+        row_cache = None if args.no_cache else load_cache("rows")
+        rows_url = ""
+        table_id_cached = False
+
+        updated = 0
+        skipped = 0
+        missing_team: List[str] = []
+
+        # Events pages -> row lookups -> service definition upserts, overlapped:
+        # a page's new services are looked up while later pages are still being
+        # fetched, and each service is upserted as soon as its team is known.
+        with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+            table_future: Future | None = None
+            if not table_id_override:
+                table_future = pool.submit(
+                    resolve_reference_table_id,
+                    client=client,
+                    base_url=base_url,
+                    headers_jsonapi=headers_jsonapi,
+                    table_name=table_name,
+                    use_cache=not args.no_cache,
+                    verbose=args.verbose,
+                )
+
+            lookups: List[Future] = []
+            upserts: List[Tuple[str, Future]] = []
+            upserted: Set[str] = set()
+            pending: List[str] = []
+            pending_since = 0.0
+            # Guards services/mapping/raw_teams/upserts/upserted, which lookup workers update
+            state_lock = threading.Lock()
+
+            def submit_upsert(service: str, team: str) -> None:
+                if team and not args.dry_run and service not in upserted:
+                    upserted.add(service)
+                    future = pool.submit(
+                        _try_upsert_service_definition, client, base_url, headers_json, service, team, args.verbose
+                    )
+                    upserts.append((service, future))
+
+            def lookup(row_ids: List[str]) -> None:
+                found, found_raw = get_reference_table_rows_by_id(
+                    client=client,
+                    rows_url=rows_url,
+                    headers_jsonapi=headers_jsonapi,
+                    row_ids=row_ids,
+                    service_col=service_col,
+                    team_col=team_col,
+                    cache=row_cache,
+                )
+                # Queue upserts from the worker itself so they start as soon as the rows arrive
+                with state_lock:
+                    mapping.update(found)
+                    raw_teams.update(found_raw)
+                    for service, team in found.items():
+                        # A row's service column can differ from the requested row id
+                        # (e.g. casing); only services seen in events get upserted. Ones
+                        # that show up in events later are picked up after paging.
+                        if service in services:
+                            submit_upsert(service, team)
+
+            def check_lookups(wait: bool = False) -> None:
+                for future in [f for f in lookups if wait or f.done()]:
+                    lookups.remove(future)
+                    try:
+                        future.result()
+                    except SystemExit:
+                        # A cached id that now 401s/404s is most likely stale; resolve it fresh next run
+                        if table_id_cached:
+                            forget_reference_table_id(base_url, table_name)
+                        raise
+
+            for new_services in iter_services_from_events(
+                client=client,
+                base_url=base_url,
+                headers_json=headers_json,
+                start=start,
+                end=end,
+                query=args.query,
+                limit=args.page_limit,
+                max_pages=args.max_pages,
+            ):
+                with state_lock:
+                    services.update(new_services)
+                if not pending:
+                    pending_since = time.monotonic()
+                pending.extend(new_services)
+                if not rows_url:
+                    if table_future is None:
+                        table_id = table_id_override
+                    else:
+                        table_id, table_id_cached = table_future.result()
+                    rows_url = get_reference_table_rows_endpoint(base_url, table_id)
+
+                check_lookups()
+                # Batch by size or timeout: send once a rows request is full, the
+                # lookup stage is idle, or ids have waited ROW_LOOKUP_MAX_WAIT.
+                if pending and (
+                    len(pending) >= ROW_LOOKUP_MAX_IDS
+                    or not lookups
+                    or time.monotonic() - pending_since >= ROW_LOOKUP_MAX_WAIT
+                ):
+                    lookups.append(pool.submit(lookup, pending))
+                    pending = []
+
+            if pending:
+                lookups.append(pool.submit(lookup, pending))
+            check_lookups(wait=True)
+            # Services whose row arrived before the service appeared in events
+            for service in services & mapping.keys():
+                submit_upsert(service, mapping[service])
+
+            if not services:
+                print("No services found in events for the given query/time window.")
+                return
+
+            updates = {
+                service: normalize_team(team)
+                for service, team in raw_teams.items()
+                if team and normalize_team(team) != team
+            }
+            if updates:
+                if args.dry_run:
+                    logger.debug("DRY RUN: would normalize %d reference table rows", len(updates))
+                else:
+                    create_reference_table_rows(
+                        client=client,
+                        rows_url=rows_url,
+                        headers_jsonapi=headers_jsonapi,
+                        service_col=service_col,
+                        team_col=team_col,
+                        rows=updates,
+                        executor=pool,
+                    )
+
+            # Create missing mappings (dummy teams)
+            dummy_rows = assign_dummy_teams(services - mapping.keys())
+
+            if dummy_rows:
+                if args.dry_run:
+                    logger.debug("DRY RUN: would create %d reference table rows", len(dummy_rows))
+                else:
+                    created, insert_failures = create_reference_table_rows(
+                        client=client,
+                        rows_url=rows_url,
+                        headers_jsonapi=headers_jsonapi,
+                        service_col=service_col,
+                        team_col=team_col,
+                        rows=dummy_rows,
+                        executor=pool,
+                    )
+                    logger.debug("Reference table rows created: %d", created)
+                    if insert_failures:
+                        print("Reference table insert failures:")
+                        for f in insert_failures:
+                            print(f"- {f}")
+                mapping.update(dummy_rows)
+                for service, team in dummy_rows.items():
+                    submit_upsert(service, team)
+
+            if row_cache is not None:
+                if not args.dry_run:
+                    # Rows written above must be re-read next run rather than served stale
+                    forget_reference_table_rows(row_cache, rows_url, [*updates, *dummy_rows])
+                save_cache("rows", row_cache)
+
+            for service in services:
+                team = (mapping.get(service) or "").strip()
+                if not team:
+                    skipped += 1
+                    missing_team.append(service)
+                elif args.dry_run:
+                    updated += 1
+
+            failed: List[Tuple[str, str]] = []
+            for service, future in upserts:
+                ok, msg = future.result()
+                if ok:
+                    updated += 1
+                else:
+                    failed.append((service, msg))
+
+        # Upserts finish in any order; only the (small) failure lists get sorted for output
+        for service, msg in sorted(failed):
             print(f"FAILED {service}: {msg}")
 
-    print(f"Services found: {len(services)}")
-    print(f"Updated: {updated}")
-    print(f"Skipped (no mapping): {skipped}")
-    print(f"Failures: {failures}")
+        print(f"Services found: {len(services)}")
+        print(f"Updated: {updated}")
+        print(f"Skipped (no mapping): {skipped}")
+        print(f"Failures: {len(failed)}")
 
-    if missing_team:
-        print("Missing mappings (no team):")
-        for s in missing_team:
-            print(f"- {s}")
+        if missing_team:
+            print("Missing mappings (no team):")
+            for s in sorted(missing_team):
+                print(f"- {s}")
 
 
 if __name__ == "__main__":